@@ -1,87 +1,244 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-import json
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import io
+import os
 import logging
+import sys
+import threading
 
 from models.schemas import XGBConfig, DataPipelineConfig
 from services.data_pipeline import DataPipeline
 from services.model_trainer import ModelTrainer
-from utils.encoders import NumpyJSONEncoder
+from utils.encoders import NumpyORJSONResponse
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
-app = FastAPI(title="XGBoost Model Training API")
+app = FastAPI(title="XGBoost Model Training API", default_response_class=NumpyORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["POST", "OPTIONS"],
+    allow_headers=["content-type", "authorization"],
 )
 
+# Limit on trainings running at once, to avoid CPU/GPU oversubscription
+MAX_CONCURRENT_TRAININGS = 2
+# Created inside the running loop: before Python 3.10 a semaphore binds to
+# the loop current at construction, which is not the one uvicorn serves on
+_train_slots: Optional[asyncio.Semaphore] = None
+# In-flight trainings keyed by hash of file contents and config
+_inflight: Dict[str, asyncio.Task] = {}
+
+class _PreparedData(NamedTuple):
+    X: np.ndarray
+    y: np.ndarray
+    target_mapping: Optional[Dict[int, str]]
+    n_classes: Optional[int]
+    feature_names: List[str]
+    pipeline: DataPipeline
+
+# Preprocessed datasets of recent uploads, so retraining the same file with
+# other hyperparameters skips parsing, encoding and scaling. The cache is
+# bounded by the bytes of the held arrays; larger datasets are not cached
+MAX_CACHED_DATASET_BYTES = 512 << 20
+MAX_CACHED_DATASET_ENTRY_BYTES = MAX_CACHED_DATASET_BYTES // 4
+_datasets: "OrderedDict[str, _PreparedData]" = OrderedDict()
+_datasets_bytes = 0
+_datasets_lock = threading.Lock()
+_INT_NBYTES = sys.getsizeof(1 << 30)
+
+def _csv_block_size(n_bytes: int) -> int:
+    """Arrow parses one block per thread: aim for a few blocks per core, 1-8 MiB each"""
+    target = n_bytes // (4 * (os.cpu_count() or 1))
+    return min(max(target, 1 << 20), 8 << 20)
+
+def _read_csv(data: bytes) -> pd.DataFrame:
+    """Read an uploaded CSV with the multithreaded Arrow reader"""
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=_csv_block_size(len(data)))
+    # Empty strings are missing values, as with pd.read_csv
+    convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+    try:
+        table = pacsv.read_csv(
+            pa.BufferReader(data), read_options=read_options, convert_options=convert_options
+        )
+        # Arrow keeps duplicate header names; pd.read_csv renames them to a, a.1
+        if len(set(table.column_names)) != table.num_columns:
+            return _downcast_numeric(pd.read_csv(io.BytesIO(data)))
+        # pd.read_csv keeps date/time text as strings; re-read those columns
+        # as strings so they are encoded as categoricals with their raw values
+        temporal = {f.name: pa.string() for f in table.schema if pa.types.is_temporal(f.type)}
+        if temporal:
+            convert_options.column_types = temporal
+            table = pacsv.read_csv(
+                pa.BufferReader(data), read_options=read_options, convert_options=convert_options
+            )
+        # All-empty columns are inferred as Arrow null; pandas reads them as float64 NaN
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+        df = table.to_pandas(self_destruct=True)
+    except pa.ArrowInvalid as e:
+        logger.warning(f"Arrow CSV parsing failed, falling back to pandas: {str(e)}")
+        df = pd.read_csv(io.BytesIO(data))
+    return _downcast_numeric(df)
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrink integer and float columns to the smallest dtype holding their values"""
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include='float').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+def _split(X: np.ndarray, y: np.ndarray, test_size: float = 0.2) -> Tuple[np.ndarray, ...]:
+    """Random train/test split by row index, sized like sklearn's train_test_split"""
+    n_test = int(np.ceil(test_size * len(y)))
+    idx = np.random.permutation(len(y))
+    train_idx, test_idx = idx[n_test:], idx[:n_test]
+    return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+def _prepare_data(file_bytes: bytes, config_obj: XGBConfig, trainer: ModelTrainer) -> _PreparedData:
+    """Parse, encode and scale an upload"""
+    # Read data
+    df = _read_csv(file_bytes)
+    logger.info(f"Loaded data with shape: {df.shape}")
+    
+    # Validate target column exists
+    if config_obj.target_column not in df.columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Target column '{config_obj.target_column}' not found in data"
+        )
+    
+    # Setup preprocessing pipeline
+    features = [col for col in df.columns if col != config_obj.target_column]
+    dtypes = df.dtypes.drop(config_obj.target_column)
+    pipeline_config = DataPipelineConfig(
+        features=features,
+        categorical_features=dtypes.index[dtypes == object].tolist(),
+        numeric_features=[col for col, dtype in dtypes.items() if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)],
+        scaling_method='standard',
+        handle_missing='mean',
+        handle_outliers=True
+    )
+    pipeline = DataPipeline(pipeline_config)
+    
+    # Encode target before splitting; the pipeline selects feature columns itself
+    y, target_mapping, n_classes = trainer.preprocess_target(df[config_obj.target_column].to_numpy())
+    
+    # Process features
+    pipeline.fit(df)
+    X_transformed, feature_names = pipeline.transform(df)
+    
+    return _PreparedData(X_transformed, y, target_mapping, n_classes, feature_names, pipeline)
+
+def _dataset_nbytes(prepared: _PreparedData) -> int:
+    """Bytes held by a cache entry, including the fitted category lookups"""
+    size = prepared.X.nbytes + prepared.y.nbytes
+    # High-cardinality columns (IDs, free text) keep an Index of strings and a
+    # str -> int mapping each, which can outweigh their float32 column in X
+    for feature, categories in prepared.pipeline.categorical_encoders.items():
+        mapping = prepared.pipeline.feature_metadata[feature].categorical_mapping
+        # Mapping keys are the Index's strings; count the dict and its int values
+        size += categories.memory_usage(deep=True) + sys.getsizeof(mapping)
+        size += len(mapping) * _INT_NBYTES
+    return size
+
+def _prepare_data_cached(file_bytes: bytes, file_key: str, config_obj: XGBConfig,
+                         trainer: ModelTrainer) -> _PreparedData:
+    """Return preprocessed data for an upload, reusing a recent identical one"""
+    # Preprocessing depends on the file, the target column and, through the
+    # target encoding, the task type; not on the model hyperparameters
+    key = f"{file_key}:{config_obj.task_type}:{config_obj.target_column}"
+    with _datasets_lock:
+        prepared = _datasets.get(key)
+        if prepared is not None:
+            _datasets.move_to_end(key)
+            logger.info("Reusing preprocessed data from cache")
+            return prepared
+    
+    prepared = _prepare_data(file_bytes, config_obj, trainer)
+    size = _dataset_nbytes(prepared)
+    if size > MAX_CACHED_DATASET_ENTRY_BYTES:
+        return prepared
+    
+    global _datasets_bytes
+    with _datasets_lock:
+        if key not in _datasets:
+            _datasets[key] = prepared
+            _datasets_bytes += size
+        while _datasets_bytes > MAX_CACHED_DATASET_BYTES:
+            _, evicted = _datasets.popitem(last=False)
+            _datasets_bytes -= _dataset_nbytes(evicted)
+    return prepared
+
+def _train_sync(file_bytes: bytes, file_key: str, config_obj: XGBConfig) -> Dict[str, Any]:
+    """Run preprocessing and training; blocking, meant for a worker thread"""
+    trainer = ModelTrainer(config_obj)
+    data = _prepare_data_cached(file_bytes, file_key, config_obj, trainer)
+    
+    # Split data
+    X_train, X_test, y_train, y_test = _split(data.X, data.y, test_size=0.2)
+    
+    # Train model and get results
+    results = trainer.train(
+        X_train, X_test, y_train, y_test, data.feature_names, data.target_mapping, data.n_classes
+    )
+    
+    # Add preprocessing metadata to results
+    results["artifacts"]["preprocessing_metadata"] = data.pipeline.export_metadata()
+    
+    return results
+
+async def _train_limited(file_bytes: bytes, file_key: str, config_obj: XGBConfig) -> Dict[str, Any]:
+    global _train_slots
+    if _train_slots is None:
+        _train_slots = asyncio.Semaphore(MAX_CONCURRENT_TRAININGS)
+    async with _train_slots:
+        return await run_in_threadpool(_train_sync, file_bytes, file_key, config_obj)
+
+async def _train_deduplicated(file_bytes: bytes, config_obj: XGBConfig) -> Dict[str, Any]:
+    """Share one training run between identical concurrent requests"""
+    file_key = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+    key = f"{file_key}:{config_obj.model_dump_json()}"
+    
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_train_limited(file_bytes, file_key, config_obj))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so a disconnecting client does not cancel the shared run
+    return await asyncio.shield(task)
+
 @app.post("/train")
 async def train_model(file: UploadFile = File(...), config: str = Form(...)):
     """Train XGBoost model with preprocessing pipeline"""
     try:
         # Parse config
-        config_data = json.loads(config)
-        config_obj = XGBConfig(**config_data)
-        
-        # Read data
-        df = pd.read_csv(file.file)
-        logger.info(f"Loaded data with shape: {df.shape}")
-        
-        # Validate target column exists
-        if config_obj.target_column not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Target column '{config_obj.target_column}' not found in data"
-            )
-        
-        # Setup preprocessing pipeline
-        features = [col for col in df.columns if col != config_obj.target_column]
-        pipeline_config = DataPipelineConfig(
-            features=features,
-            categorical_features=df[features].select_dtypes(include=['object']).columns.tolist(),
-            numeric_features=df[features].select_dtypes(include=['int64', 'float64']).columns.tolist(),
-            scaling_method='standard',
-            handle_missing='mean',
-            handle_outliers=True
-        )
-        
-        # Initialize pipeline and trainer
-        pipeline = DataPipeline(pipeline_config)
-        trainer = ModelTrainer(config_obj)
-        
-        # Prepare features and target
-        X = df.drop(columns=[config_obj.target_column])
-        y = df[config_obj.target_column]
-        
-        # Process features
-        pipeline.fit(X)
-        X_transformed, feature_names = pipeline.transform(X)
+        config_obj = XGBConfig.model_validate_json(config)
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X_transformed, y, test_size=0.2)
-        
-        # Train model and get results
-        results = trainer.train(X_train, X_test, y_train, y_test, feature_names)
-        
-        # Add preprocessing metadata to results
-        results["artifacts"]["preprocessing_metadata"] = pipeline.export_metadata()
+        # Train off the event loop
+        file_bytes = await file.read()
+        results = await _train_deduplicated(file_bytes, config_obj)
         
         # Return results
-        return JSONResponse(
-            content=json.loads(json.dumps(results, cls=NumpyJSONEncoder))
-        )
+        return NumpyORJSONResponse(results)
         
     except Exception as e:
         logger.error(f"Error in train_model: {str(e)}")
@@ -89,4 +246,13 @@ async def train_model(file: UploadFile = File(...), config: str = Form(...)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # loop/http 'auto' pick uvloop and httptools when installed
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=workers
+    )
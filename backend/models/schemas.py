@@ -6,12 +6,15 @@ class XGBParameters(BaseModel):
     max_depth: int = Field(default=3, ge=1, le=10)
     learning_rate: float = Field(default=0.1, gt=0, le=1)
     n_estimators: int = Field(default=100, ge=1, le=1000)
+    max_bin: int = Field(default=256, ge=2, le=1024)  # histogram bins per feature
     objective: Optional[str] = None
 
 class XGBConfig(BaseModel):
     target_column: str
-    task_type: str = Field(..., regex='^(binary_classification|multiclass_classification|regression)$')
+    task_type: str = Field(..., pattern='^(binary_classification|multiclass_classification|regression)$')
     parameters: XGBParameters = XGBParameters()
+    device: Optional[str] = Field(default=None, pattern='^(cpu|cuda)$')  # None picks cuda when available
+    n_jobs: Optional[int] = Field(default=None, ge=1)  # None uses one thread per physical core
 
 @dataclass
 class FeatureMetadata:
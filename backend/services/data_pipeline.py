@@ -1,12 +1,9 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, LabelEncoder
-from typing import Dict, List, Optional, Union, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-import json
 
 from models.schemas import DataPipelineConfig, FeatureMetadata
-from utils.encoders import NumpyJSONEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +11,14 @@ class DataPipeline:
     def __init__(self, config: DataPipelineConfig):
         self.config = config
         self.feature_metadata: Dict[str, FeatureMetadata] = {}
-        self.categorical_encoders: Dict[str, LabelEncoder] = {}
-        self.numeric_scaler: Optional[Union[StandardScaler, MinMaxScaler]] = None
+        self.categorical_encoders: Dict[str, pd.Index] = {}
+        # Numeric features are scaled as (x - center) / scale
+        self._center: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self._num_positions: Optional[np.ndarray] = None
+        self._cat_positions: Optional[np.ndarray] = None
+        self._other_positions: Optional[np.ndarray] = None
+        self._other_features: List[str] = []
         
     def fit(self, df: pd.DataFrame) -> None:
         """Fit the pipeline on training data"""
@@ -25,54 +28,69 @@ class DataPipeline:
             if missing_cols:
                 raise ValueError(f"Missing columns in data: {missing_cols}")
             
-            # Handle missing values
-            df = self._handle_missing_values(df)
+            # Handle missing values on the feature columns only
+            df = self._handle_missing_values(df[self.config.features])
             
             # Process categorical features
             for feature in self.config.categorical_features:
-                encoder = LabelEncoder()
-                df[feature] = df[feature].astype(str)
-                encoder.fit(df[feature])
-                self.categorical_encoders[feature] = encoder
+                categories = df[feature].astype(str).astype('category').cat.categories
+                mapping = dict(zip(categories, range(len(categories))))
+                self.categorical_encoders[feature] = categories
                 
                 self.feature_metadata[feature] = FeatureMetadata(
                     name=feature,
                     dtype='categorical',
-                    categorical_mapping=dict(zip(encoder.classes_, encoder.transform(encoder.classes_)))
+                    categorical_mapping=mapping
                 )
             
             # Process numeric features
-            numeric_data = df[self.config.numeric_features].copy()
+            numeric_data = df[self.config.numeric_features].to_numpy(dtype=np.float32)
             
             if self.config.handle_outliers:
                 numeric_data = self._handle_outliers(numeric_data)
             
-            # Fit scaler
+            # Fit scaling; constant columns get a scale of 1, as in scikit-learn
             if self.config.scaling_method == 'standard':
-                self.numeric_scaler = StandardScaler()
+                center = numeric_data.mean(axis=0, dtype=np.float64)
+                scale = numeric_data.std(axis=0, dtype=np.float64)
             else:
-                self.numeric_scaler = MinMaxScaler()
-                
-            self.numeric_scaler.fit(numeric_data)
+                center = numeric_data.min(axis=0).astype(np.float64)
+                scale = numeric_data.max(axis=0).astype(np.float64) - center
+            scale[scale == 0] = 1.0
+            self._center = center.astype(np.float32)
+            self._scale = scale.astype(np.float32)
             
-            # Store numeric feature metadata
+            # Store numeric feature metadata, in StandardScaler/MinMaxScaler terms
             scaling_params = {
-                'mean': self.numeric_scaler.mean_.tolist(),
-                'scale': self.numeric_scaler.scale_.tolist()
-            } if isinstance(self.numeric_scaler, StandardScaler) else {
-                'min': self.numeric_scaler.min_.tolist(),
-                'scale': self.numeric_scaler.scale_.tolist()
+                'mean': center.tolist(),
+                'scale': scale.tolist()
+            } if self.config.scaling_method == 'standard' else {
+                'min': (-center / scale).tolist(),
+                'scale': (1.0 / scale).tolist()
             }
             
-            for idx, feature in enumerate(self.config.numeric_features):
+            # tolist() already produced Python floats; zip them per feature
+            param_names = list(scaling_params)
+            for feature, values in zip(self.config.numeric_features, zip(*scaling_params.values())):
                 self.feature_metadata[feature] = FeatureMetadata(
                     name=feature,
                     dtype='numeric',
-                    scaling_params={
-                        param: float(values[idx]) 
-                        for param, values in scaling_params.items()
-                    }
+                    scaling_params=dict(zip(param_names, values))
                 )
+            
+            # Precompute output column positions for transform
+            encoded = set(self.config.numeric_features) | set(self.config.categorical_features)
+            positions = {feature: idx for idx, feature in enumerate(self.config.features)}
+            self._num_positions = np.array(
+                [positions[feature] for feature in self.config.numeric_features], dtype=np.intp
+            )
+            self._cat_positions = np.array(
+                [positions[feature] for feature in self.config.categorical_features], dtype=np.intp
+            )
+            self._other_features = [f for f in self.config.features if f not in encoded]
+            self._other_positions = np.array(
+                [positions[feature] for feature in self._other_features], dtype=np.intp
+            )
                 
         except Exception as e:
             logger.error(f"Error in pipeline fit: {str(e)}")
@@ -81,91 +99,107 @@ class DataPipeline:
     def transform(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
         """Transform data using fitted pipeline"""
         try:
-            df = df.copy()
+            # Handle missing values on the feature columns only
+            df = self._handle_missing_values(df[self.config.features])
             
-            # Handle missing values
-            df = self._handle_missing_values(df)
+            # Combine features in correct order
+            out = np.empty((len(df), len(self.config.features)), dtype=np.float32)
             
-            # Transform categorical features
-            for feature in self.config.categorical_features:
-                encoder = self.categorical_encoders[feature]
-                df[feature] = df[feature].astype(str)
-                # Handle unseen categories
-                df[feature] = df[feature].map(lambda x: x if x in encoder.classes_ else encoder.classes_[0])
-                df[feature] = encoder.transform(df[feature])
+            # Transform categorical features straight into their output columns
+            for feature, position in zip(self.config.categorical_features, self._cat_positions):
+                categories = self.categorical_encoders[feature]
+                codes = categories.get_indexer(df[feature].astype(str))
+                # Unseen categories (-1) fall back to the first category
+                codes[codes < 0] = 0
+                out[:, position] = codes
             
             # Transform numeric features
-            numeric_data = df[self.config.numeric_features].copy()
+            numeric_data = df[self.config.numeric_features].to_numpy(dtype=np.float32)
             if self.config.handle_outliers:
                 numeric_data = self._handle_outliers(numeric_data)
-            numeric_data = self.numeric_scaler.transform(numeric_data)
+            out[:, self._num_positions] = (numeric_data - self._center) / self._scale
+            out[:, self._other_positions] = df[self._other_features].to_numpy()
             
-            # Combine features in correct order
-            transformed_data = []
-            feature_names = []
-            for feature in self.config.features:
-                if feature in self.config.numeric_features:
-                    idx = self.config.numeric_features.index(feature)
-                    transformed_data.append(numeric_data[:, idx])
-                else:
-                    transformed_data.append(df[feature].values)
-                feature_names.append(feature)
-            
-            return np.column_stack(transformed_data), feature_names
+            return out, list(self.config.features)
             
         except Exception as e:
             logger.error(f"Error in pipeline transform: {str(e)}")
             raise
     
     def _handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
+        # dropna/fillna return new frames and callers never write to the
+        # result, so the input is never mutated
         if self.config.handle_missing == 'drop':
             return df.dropna()
         
-        for feature in self.config.numeric_features:
-            if df[feature].isnull().any():
-                if self.config.handle_missing == 'mean':
-                    fill_value = df[feature].mean()
-                elif self.config.handle_missing == 'median':
-                    fill_value = df[feature].median()
-                else:  # mode
-                    fill_value = df[feature].mode()[0]
-                df[feature].fillna(fill_value, inplace=True)
+        # fillna copies every column it is given, so only pass those with gaps
+        fill_values = {}
+        numeric = self._columns_with_missing(df, self.config.numeric_features)
+        if numeric:
+            # One reduction over all incomplete numeric columns
+            if self.config.handle_missing == 'mode':
+                fill_values.update(self._first_modes(df[numeric]))
+            else:  # mean or median
+                fill_values.update(df[numeric].agg(self.config.handle_missing).to_dict())
         
-        for feature in self.config.categorical_features:
-            if df[feature].isnull().any():
-                df[feature].fillna(df[feature].mode()[0], inplace=True)
+        # mode() is costly too, so it is likewise limited to incomplete columns
+        categorical = self._columns_with_missing(df, self.config.categorical_features)
+        if categorical:
+            fill_values.update(self._first_modes(df[categorical]))
         
-        return df
+        if not fill_values:
+            return df
+        return df.fillna(fill_values)
+    
+    @staticmethod
+    def _columns_with_missing(df: pd.DataFrame, columns: List[str]) -> List[str]:
+        if not columns:
+            return []
+        has_missing = df[columns].isnull().any()
+        return has_missing.index[has_missing].tolist()
+    
+    @staticmethod
+    def _first_modes(df: pd.DataFrame) -> Dict[str, Any]:
+        """First mode of each column; all-missing columns have none and are skipped"""
+        modes = df.mode()
+        if modes.empty:
+            return {}
+        return modes.iloc[0].dropna().to_dict()
     
-    def _handle_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        for feature in df.columns:
-            z_scores = np.abs((df[feature] - df[feature].mean()) / df[feature].std())
-            mask = z_scores > self.config.outlier_threshold
-            if mask.any():
-                df.loc[mask, feature] = df[feature].mean()
-        return df
+    def _handle_outliers(self, arr: np.ndarray) -> np.ndarray:
+        """Replace values beyond the z-score threshold with the column mean"""
+        n = arr.shape[0]
+        # float32 sums along axis 0 are not pairwise and drift on large
+        # tables, so the mean is accumulated in float64
+        mu = arr.mean(axis=0, dtype=np.float64).astype(arr.dtype)
+        # Deviations are computed once and reused for the std, the z-scores
+        # and finally as the output buffer, so only one float temporary exists
+        z = arr - mu
+        # Sum of squares and sqrt in float64 for the same reason as the mean
+        sd = np.sqrt(np.einsum('ij,ij->j', z, z, dtype=np.float64) / max(n - 1, 1))
+        sd[sd == 0] = 1.0
+        np.abs(z, out=z)
+        z /= sd.astype(arr.dtype)
+        mask = z > self.config.outlier_threshold
+        np.copyto(z, arr)
+        np.copyto(z, mu, where=mask)
+        return z
     
-    def export_metadata(self) -> str:
-        """Export pipeline metadata as JSON"""
+    def export_metadata(self) -> Dict[str, Any]:
+        """Export pipeline metadata as a JSON-serializable dict"""
+        # Mappings and scaling params already hold plain str/int/float values
         metadata = {
             'features': self.config.features,
             'categorical_features': {
-                feature: {
-                    str(k): int(v)
-                    for k, v in self.feature_metadata[feature].categorical_mapping.items()
-                }
-                for feature in self.config.categorical_features
+                feature: md.categorical_mapping
+                for feature, md in self.feature_metadata.items()
+                if md.dtype == 'categorical'
             },
             'numeric_features': {
-                feature: {
-                    k: float(v)
-                    for k, v in self.feature_metadata[feature].scaling_params.items()
-                }
-                for feature in self.config.numeric_features
+                feature: md.scaling_params
+                for feature, md in self.feature_metadata.items()
+                if md.dtype == 'numeric'
             },
             'scaling_method': self.config.scaling_method
         }
-        return json.dumps(metadata, indent=2, cls=NumpyJSONEncoder)
\ No newline at end of file
+        return metadata
\ No newline at end of file
@@ -1,28 +1,83 @@
 import numpy as np
+import pandas as pd
 import xgboost as xgb
-from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import mean_squared_error, confusion_matrix
 from typing import Dict, Any, Tuple, Optional
-import tempfile
-import os
+import json
+import orjson
 import logging
+import os
+import psutil
 
 from models.schemas import XGBConfig
-from utils.encoders import encode_model_data
+from utils.encoders import embed_model_data
 
 logger = logging.getLogger(__name__)
 
+# Metric tracked on the training set during boosting, per task type
+_TRAIN_METRICS = {
+    'regression': 'rmse',
+    'binary_classification': 'error',
+    'multiclass_classification': 'merror'
+}
+
+# Normalized feature importances are sent as integers in [0, IMPORTANCE_SCALE]
+IMPORTANCE_SCALE = 255
+
+def _cuda_available() -> bool:
+    """Check whether XGBoost can actually train on a CUDA device"""
+    try:
+        # A CUDA build can still lack a usable GPU or driver at runtime
+        if not xgb.build_info().get('USE_CUDA', False):
+            return False
+        # XGBoost silently falls back to CPU when no device is usable, so
+        # fit a tiny booster and read back the device it ended up on
+        with xgb.config_context(verbosity=0):
+            dtrain = xgb.DMatrix(np.zeros((2, 1), dtype=np.float32), label=[0.0, 1.0])
+            booster = xgb.train({'device': 'cuda', 'tree_method': 'hist'}, dtrain, num_boost_round=1)
+        config = json.loads(booster.save_config())
+        return config['learner']['generic_param']['device'].startswith('cuda')
+    except Exception:
+        return False
+
+_DEVICE = 'cuda' if _cuda_available() else 'cpu'
+# Below this many training rows, transfer and kernel launch overhead
+# outweighs the GPU speedup, so automatic device selection stays on CPU
+GPU_MIN_ROWS = 50_000
+# Histogram building is memory-bandwidth bound and hyperthreads compete for
+# the same caches and ports as their siblings, so CPU training uses one
+# thread per physical core
+_PHYSICAL_CORES = psutil.cpu_count(logical=False) or os.cpu_count()
+
 class ModelTrainer:
     def __init__(self, config: XGBConfig):
         self.config = config
         self.model = None
-        self.target_encoder = None
 
-    def _init_model(self, n_classes: Optional[int] = None) -> None:
+    def _select_device(self, n_rows: int) -> str:
+        """Use the configured device, else the GPU only for large datasets"""
+        if self.config.device:
+            return self.config.device
+        return _DEVICE if n_rows >= GPU_MIN_ROWS else 'cpu'
+
+    def _init_model(self, n_classes: Optional[int] = None, device: str = 'cpu') -> None:
         """Initialize XGBoost model based on task type"""
-        model_params = self.config.parameters.dict()
+        model_params = self.config.parameters.model_dump()
         if 'objective' in model_params:
             del model_params['objective']
+        
+        # Histogram training, on GPU when selected
+        model_params.update(
+            tree_method='hist',
+            device=device,
+            eval_metric=_TRAIN_METRICS[self.config.task_type]
+        )
+        # An explicit thread count always wins; the GPU build only uses
+        # host threads for data preparation, so it keeps XGBoost's default
+        if self.config.n_jobs:
+            model_params['n_jobs'] = self.config.n_jobs
+        elif device == 'cpu':
+            model_params['n_jobs'] = _PHYSICAL_CORES
             
         if self.config.task_type == 'regression':
             self.model = xgb.XGBRegressor(**model_params)
@@ -38,38 +93,49 @@ class ModelTrainer:
                 objective='binary:logistic'
             )
     
-    def preprocess_target(self, y: np.ndarray) -> Tuple[np.ndarray, Optional[Dict[int, str]]]:
-        """Preprocess target variable and return mapping if applicable"""
+    def preprocess_target(self, y: np.ndarray) -> Tuple[np.ndarray, Optional[Dict[int, str]], Optional[int]]:
+        """Preprocess target variable and return mapping and class count if applicable"""
         target_mapping = None
+        n_classes = None
         
         if self.config.task_type != 'regression':
             if y.dtype == 'object' or self.config.task_type == 'multiclass_classification':
-                self.target_encoder = LabelEncoder()
-                y = self.target_encoder.fit_transform(y)
-                target_mapping = dict(enumerate(map(str, self.target_encoder.classes_)))
+                # Sorted like LabelEncoder; unlike np.unique this copes with
+                # missing labels, which become a class of their own
+                y, classes = pd.factorize(y, sort=True, use_na_sentinel=False)
+                target_mapping = {i: str(c) for i, c in enumerate(classes)}
+                n_classes = len(classes)
             else:
                 target_mapping = {0: 'class_0', 1: 'class_1'}
+                n_classes = int(y.max()) + 1
                 
-        return y, target_mapping
+        return y, target_mapping, n_classes
+
+    def _fit(self, X_train: np.ndarray, y_train: np.ndarray) -> None:
+        # Evaluating on the training matrix itself reuses its DMatrix, so the
+        # training metric comes out of boosting without another predict pass
+        self.model.fit(X_train, y_train, eval_set=[(X_train, y_train)], verbose=False)
+
+    def _final_train_metric(self) -> float:
+        metric = _TRAIN_METRICS[self.config.task_type]
+        return float(self.model.evals_result()['validation_0'][metric][-1])
 
-    def _calculate_regression_metrics(self, y_train: np.ndarray, y_test: np.ndarray,
-                                   y_pred_train: np.ndarray, y_pred_test: np.ndarray,
+    def _calculate_regression_metrics(self, y_test: np.ndarray, y_pred_test: np.ndarray,
                                    n_features: int) -> Dict[str, Any]:
         """Calculate metrics for regression tasks"""
         return {
-            'train_rmse': float(np.sqrt(mean_squared_error(y_train, y_pred_train))),
+            'train_rmse': self._final_train_metric(),
             'test_rmse': float(np.sqrt(mean_squared_error(y_test, y_pred_test))),
             'n_features': int(n_features),
             'test_predictions': {
-                'actual': y_test.tolist(),
-                'predicted': y_pred_test.tolist()
+                'actual': y_test,
+                'predicted': y_pred_test
             }
         }
 
-    def _calculate_classification_metrics(self, X_train: np.ndarray, X_test: np.ndarray,
-                                       y_train: np.ndarray, y_test: np.ndarray,
+    def _calculate_classification_metrics(self, X_test: np.ndarray, y_test: np.ndarray,
                                        y_pred_test: np.ndarray, n_features: int,
-                                       target_mapping: Dict[int, str]) -> Dict[str, Any]:
+                                       n_classes: int) -> Dict[str, Any]:
         """Calculate metrics for classification tasks"""
         from sklearn.metrics import roc_auc_score, confusion_matrix
         
@@ -85,56 +151,63 @@ class ModelTrainer:
             auc_score = float(roc_auc_score(y_test, y_pred_proba, multi_class='ovr'))
         
         return {
-            'train_accuracy': float(self.model.score(X_train, y_train)),
-            'test_accuracy': float(self.model.score(X_test, y_test)),
+            'train_accuracy': 1.0 - self._final_train_metric(),
+            'test_accuracy': float(np.mean(y_pred_test == y_test)),
             'auc_score': auc_score,
-            'n_classes': int(len(target_mapping) if target_mapping else 2),
+            'n_classes': int(n_classes),
             'n_features': int(n_features),
-            'confusion_matrix': conf_matrix.tolist()
+            'confusion_matrix': conf_matrix
         }
     
     def train(self, X_train: np.ndarray, X_test: np.ndarray, 
              y_train: np.ndarray, y_test: np.ndarray, 
-             feature_names: list) -> Dict[str, Any]:
-        """Train model and return metrics and artifacts"""
+             feature_names: list, target_mapping: Optional[Dict[int, str]] = None,
+             n_classes: Optional[int] = None) -> Dict[str, Any]:
+        """Train model on a target already encoded by preprocess_target"""
         try:
-            # Preprocess target if needed
-            y_train_processed, target_mapping = self.preprocess_target(y_train)
-            if self.target_encoder is not None:
-                y_test = self.target_encoder.transform(y_test)
+            # XGBoost bins float32 internally; avoid float64 copies into its matrices
+            X_train = np.asarray(X_train, dtype=np.float32)
+            X_test = np.asarray(X_test, dtype=np.float32)
             
             # Initialize and train model
-            n_classes = len(np.unique(y_train_processed)) if self.config.task_type != 'regression' else None
-            self._init_model(n_classes)
-            self.model.fit(X_train, y_train_processed)
+            self._init_model(n_classes, self._select_device(len(X_train)))
+            try:
+                self._fit(X_train, y_train)
+            except xgb.core.XGBoostError as e:
+                if self.model.get_params().get('device') != 'cuda':
+                    raise
+                logger.warning(f"GPU training failed, falling back to CPU: {str(e)}")
+                self._init_model(n_classes, device='cpu')
+                self._fit(X_train, y_train)
             
             # Calculate predictions and metrics
+            y_pred_test = self.model.predict(X_test)
             if self.config.task_type == 'regression':
-                y_pred_train = self.model.predict(X_train)
-                y_pred_test = self.model.predict(X_test)
                 metrics = self._calculate_regression_metrics(
-                    y_train, y_test, y_pred_train, y_pred_test, len(feature_names)
+                    y_test, y_pred_test, len(feature_names)
                 )
             else:
-                y_pred_test = self.model.predict(X_test)
                 metrics = self._calculate_classification_metrics(
-                    X_train, X_test, y_train_processed, y_test, y_pred_test, 
-                    len(feature_names), target_mapping
+                    X_test, y_test, y_pred_test, len(feature_names), n_classes
                 )
             
             # Calculate feature importance
-            importance = self.model.feature_importances_
-            importance = (importance - importance.min()) / (importance.max() - importance.min()) \
-                if len(importance) > 1 else importance
-            importance = [float(x) for x in importance]
+            importance = self.model.feature_importances_.astype(np.float32)
+            if len(importance) > 1:
+                # Min-max normalize; all-equal importances (e.g. no splits) map to 0
+                lo, hi = importance.min(), importance.max()
+                importance = (importance - lo) / (hi - lo) if hi > lo else np.zeros_like(importance)
+            importance = np.clip(np.rint(importance * IMPORTANCE_SCALE), 0, IMPORTANCE_SCALE)
+            importance = importance.astype(np.uint8)
             
-            # Save and encode model
+            # Save model
             model_data = self._save_model()
             
             return {
                 "status": "success",
                 "metrics": metrics,
                 "feature_importance": importance,
+                "feature_importance_scale": float(IMPORTANCE_SCALE),
                 "feature_names": feature_names,
                 "class_mapping": target_mapping,
                 "artifacts": {
@@ -149,11 +222,6 @@ class ModelTrainer:
             logger.error(f"Error in model training: {str(e)}")
             raise
     
-    def _save_model(self) -> str:
-        """Save model to temporary file and return encoded data"""
-        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
-            self.model.save_model(tmp.name)
-            with open(tmp.name, 'rb') as f:
-                model_data = encode_model_data(f.read())
-            os.unlink(tmp.name)
-        return model_data
\ No newline at end of file
+    def _save_model(self) -> orjson.Fragment:
+        """Serialize model in memory as JSON, embedded in the response without re-encoding"""
+        return embed_model_data(self.model.get_booster().save_raw('json'))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from models.schemas import DataPipelineConfig
+from services.data_pipeline import DataPipeline
+
+
+def _reference_outliers(arr: np.ndarray, threshold: float) -> np.ndarray:
+    """Outlier clipping computed entirely in float64"""
+    arr = arr.astype(np.float64)
+    mu = arr.mean(axis=0)
+    sd = arr.std(axis=0, ddof=1)
+    sd[sd == 0] = 1.0
+    mask = np.abs((arr - mu) / sd) > threshold
+    return np.where(mask, mu, arr)
+
+
+def test_handle_outliers_matches_float64_reference_on_large_table():
+    rng = np.random.default_rng(0)
+    arr = rng.normal(1000.0, 10.0, size=(2_000_000, 4)).astype(np.float32)
+    columns = [f"x{i}" for i in range(arr.shape[1])]
+    pipeline = DataPipeline(DataPipelineConfig(
+        features=columns, categorical_features=[], numeric_features=columns
+    ))
+
+    clipped = pipeline._handle_outliers(arr)
+    expected = _reference_outliers(arr, pipeline.config.outlier_threshold)
+
+    clipped_mask = clipped != arr
+    expected_mask = expected != arr.astype(np.float64)
+    # Only values sitting on the threshold may flip due to float32 rounding
+    assert expected_mask.sum(axis=0).min() > 1000
+    assert np.count_nonzero(clipped_mask != expected_mask) <= 10
+    np.testing.assert_allclose(clipped[clipped_mask], expected[clipped_mask], rtol=1e-6)
+
+
+def test_handle_missing_values_skips_all_missing_columns():
+    df = pd.DataFrame({
+        "cat": ["a", "b", "a"],
+        "empty": pd.Series([None, None, None], dtype=object),
+        "num": [1.0, np.nan, 3.0],
+    })
+    pipeline = DataPipeline(DataPipelineConfig(
+        features=list(df.columns), categorical_features=["cat", "empty"],
+        numeric_features=["num"], handle_missing="mode"
+    ))
+
+    filled = pipeline._handle_missing_values(df)
+
+    assert filled["cat"].tolist() == ["a", "b", "a"]
+    assert filled["empty"].isnull().all()
+    assert filled["num"].tolist() == [1.0, 1.0, 3.0]
+
+
+@pytest.mark.parametrize("scaling_method", ["standard", "minmax"])
+def test_export_metadata_matches_sklearn_scalers(scaling_method):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "a": rng.normal(5.0, 2.0, 500),
+        "b": rng.uniform(-10.0, 10.0, 500),
+        "const": np.full(500, 3.0),
+    }).astype(np.float32)
+    pipeline = DataPipeline(DataPipelineConfig(
+        features=list(df.columns), categorical_features=[], numeric_features=list(df.columns),
+        scaling_method=scaling_method, handle_outliers=False
+    ))
+
+    pipeline.fit(df)
+    exported = pipeline.export_metadata()["numeric_features"]
+
+    if scaling_method == "standard":
+        scaler = StandardScaler().fit(df.to_numpy(dtype=np.float64))
+        expected = {"mean": scaler.mean_, "scale": scaler.scale_}
+    else:
+        scaler = MinMaxScaler().fit(df.to_numpy(dtype=np.float64))
+        expected = {"min": scaler.min_, "scale": scaler.scale_}
+    for name, values in expected.items():
+        actual = [exported[feature][name] for feature in df.columns]
+        np.testing.assert_allclose(actual, values, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+import pytest
+
+from main import _dataset_nbytes, _downcast_numeric, _prepare_data, _read_csv
+from models.schemas import XGBConfig
+from services.model_trainer import ModelTrainer
+
+
+def _pandas_reference(data: bytes) -> pd.DataFrame:
+    return _downcast_numeric(pd.read_csv(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize("data", [
+    b"date,x\n2024-01-01,1\n2024-01-02,2\n",
+    b"empty,x\n,1\n,2\n",
+    b"s,x\na,1\n,2\nb,3\n",
+    b"a,a,b\n1,x,2.5\n3,y,4.5\n",
+], ids=["date", "all_empty", "empty_strings", "duplicate_headers"])
+def test_read_csv_matches_pandas(data):
+    df = _read_csv(data)
+    expected = _pandas_reference(data)
+
+    assert df.columns.tolist() == expected.columns.tolist()
+    assert df.dtypes.tolist() == expected.dtypes.tolist()
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_dataset_nbytes_counts_category_lookups():
+    n = 10_000
+    data = "id,x,y\n" + "".join(f"user-{i:08d},{i},{i % 2}\n" for i in range(n))
+    config = XGBConfig(target_column="y", task_type="binary_classification")
+    prepared = _prepare_data(data.encode(), config, ModelTrainer(config))
+
+    # Each distinct string id costs far more than its float32 slot in X
+    assert _dataset_nbytes(prepared) > prepared.X.nbytes + prepared.y.nbytes + 50 * n
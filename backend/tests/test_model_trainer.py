@@ -0,0 +1,31 @@
+import numpy as np
+import orjson
+
+from models.schemas import XGBConfig
+from services.model_trainer import ModelTrainer
+from utils.encoders import NumpyORJSONResponse
+
+
+def test_preprocess_target_keeps_missing_labels_as_a_class():
+    trainer = ModelTrainer(XGBConfig(target_column="y", task_type="multiclass_classification"))
+    y = np.array(["b", "a", None, "b"], dtype=object)
+
+    encoded, mapping, n_classes = trainer.preprocess_target(y)
+
+    assert n_classes == 3
+    assert mapping[0] == "a" and mapping[1] == "b"
+    assert encoded.tolist() == [1, 0, 2, 1]
+
+
+def test_train_response_embeds_model_json():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 3), dtype=np.float32)
+    y = (X[:, 0] > 0.5).astype(np.int64)
+    trainer = ModelTrainer(XGBConfig(
+        target_column="y", task_type="binary_classification", parameters={"n_estimators": 5}
+    ))
+
+    results = trainer.train(X[:150], X[150:], y[:150], y[150:], ["a", "b", "c"], {0: "n", 1: "p"}, 2)
+    body = orjson.loads(NumpyORJSONResponse(results).body)
+
+    assert body["artifacts"]["model"]["data"]["learner"]["objective"]["name"] == "binary:logistic"
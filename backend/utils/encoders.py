@@ -1,20 +1,23 @@
-import json
 import numpy as np
+import orjson
+from fastapi.responses import ORJSONResponse
+from typing import Any, Union
 
-class NumpyJSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder for NumPy types"""
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                          np.int16, np.int32, np.int64, np.uint8,
-                          np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+def _orjson_default(obj):
+    # Non-contiguous arrays are not handled by OPT_SERIALIZE_NUMPY
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError
 
-def encode_model_data(model_data: bytes) -> str:
-    """Encode model data as base64 string"""
-    import base64
-    return base64.b64encode(model_data).decode('utf-8')
\ No newline at end of file
+class NumpyORJSONResponse(ORJSONResponse):
+    """ORJSON response serializing NumPy types natively"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+def embed_model_data(model_data: Union[bytes, bytearray, memoryview]) -> orjson.Fragment:
+    """Wrap serialized JSON model data so it is embedded in the response as is"""
+    return orjson.Fragment(bytes(model_data))
\ No newline at end of file
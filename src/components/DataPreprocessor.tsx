@@ -1,4 +1,4 @@
-interface PipelineMetadata {
+export interface PipelineMetadata {
     features: string[];
     categorical_features: {
       [feature: string]: { [category: string]: number };
@@ -16,8 +16,8 @@ interface PipelineMetadata {
   export class DataPreprocessor {
     private metadata: PipelineMetadata;
   
-    constructor(metadataJson: string) {
-      this.metadata = JSON.parse(metadataJson);
+    constructor(metadata: PipelineMetadata) {
+      this.metadata = metadata;
     }
   
     private standardScaleValue(value: number, mean: number, scale: number): number {
@@ -18,12 +18,12 @@ import {
   TableRow
 } from '@mui/material';
 import { Refresh as RefreshIcon } from '@mui/icons-material';
-import { XGBoostPredictor } from './XGBoostPredictor';
-import { DataPreprocessor } from './DataPreprocessor';
+import { XGBoostModel, XGBoostPredictor } from './XGBoostPredictor';
+import { DataPreprocessor, PipelineMetadata } from './DataPreprocessor';
 
 interface ModelTesterProps {
-  modelData: string; // base64 encoded model
-  preprocessingMetadata: string;
+  modelData: XGBoostModel;
+  preprocessingMetadata: PipelineMetadata;
   featureNames: string[];
   classMapping?: Record<number, string>;
   isRegression?: boolean;
@@ -73,8 +73,7 @@ export const ModelTester: React.FC<ModelTesterProps> = ({
   // Initialize predictor
   const getPredictor = useCallback(() => {
     try {
-      const modelJson = atob(modelData);
-      return new XGBoostPredictor(modelJson);
+      return new XGBoostPredictor(modelData);
     } catch (err) {
       throw new Error('Failed to initialize model: Invalid model data');
     }
@@ -86,8 +86,8 @@ export const TrainingForm = ({ onTrainingComplete }: TrainingFormProps) => {
     if (!result?.artifacts.model.data || !result?.artifacts.preprocessing_metadata) return;
     
     const inferencePackage = {
-      model: JSON.parse(atob(result.artifacts.model.data)),
-      preprocessing_metadata: JSON.parse(result.artifacts.preprocessing_metadata),
+      model: result.artifacts.model.data,
+      preprocessing_metadata: result.artifacts.preprocessing_metadata,
       feature_names: result.feature_names,
       class_mapping: result.class_mapping,
       isRegression: !result.metrics.train_accuracy
@@ -287,7 +287,7 @@ export const TrainingForm = ({ onTrainingComplete }: TrainingFormProps) => {
                 <Box sx={{ display: 'flex' }}>
                   <Typography variant="body2">{name}:</Typography>
                   <Typography variant="body2" color="primary" marginLeft="6px">
-                    {result.feature_importance[i].toFixed(4)}
+                    {(result.feature_importance[i] / result.feature_importance_scale).toFixed(2)}
                   </Typography>
                 </Box>
               </Grid>
@@ -31,7 +31,7 @@ interface ObjectiveParam {
     };
 }
   
-interface XGBoostModel {
+export interface XGBoostModel {
     learner: {
       objective: ObjectiveParam;
       gradient_booster: GradientBooster;
@@ -49,9 +49,9 @@ export class XGBoostPredictor {
     private objective: string;
     private isClassification: boolean;
   
-    constructor(modelJson: string) {
+    constructor(model: XGBoostModel) {
       try {
-        this.model = JSON.parse(modelJson);
+        this.model = model;
         
         if (!this.model?.learner?.objective?.name) {
           throw new Error("Invalid model format: missing objective");
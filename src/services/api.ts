@@ -1,4 +1,6 @@
 import axios from 'axios';
+import { PipelineMetadata } from '../components/DataPreprocessor';
+import { XGBoostModel } from '../components/XGBoostPredictor';
 
 export type TaskType = 'binary_classification' | 'multiclass_classification' | 'regression';
 
@@ -9,6 +11,7 @@ export interface XGBoostConfig {
     max_depth: number;
     learning_rate: number;
     n_estimators: number;
+    max_bin?: number;
   };
 }
 
@@ -28,16 +31,17 @@ export interface TrainingResult {
       predicted: number[];
     };
   };
-  feature_importance: number[];
+  feature_importance: number[]; // quantized, divide by feature_importance_scale
+  feature_importance_scale: number;
   feature_names: string[];
   class_mapping?: Record<number, string>;
   artifacts: {
     model: {
-      data: string; // base64 encoded
+      data: XGBoostModel; // XGBoost JSON model
       format: string;
     };
     typescript_code: string;
-    preprocessing_metadata: string;
+    preprocessing_metadata: PipelineMetadata;
   };
 }
 